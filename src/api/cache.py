@@ -0,0 +1,129 @@
+"""Response caching for read-mostly endpoints.
+
+Cached responses live under a per-user generation token. Writes start a
+new generation instead of deleting keys by pattern, so invalidation is a
+single SET no matter how many responses are cached, and entries from
+older generations are simply never read again until they expire.
+
+Caching only runs against Redis, which expires those entries itself and
+is shared by every worker. When the backend fails, reads fall through to
+the database rather than failing the request.
+"""
+import hashlib
+import logging
+import uuid
+from typing import Any, Optional
+
+import orjson
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+from redis.exceptions import RedisError
+
+CACHE_PREFIX = "tf"
+
+# Cached task lists live for TASK_LIST_EXPIRE seconds; generation tokens
+# must outlive them so a lapsed token can't revive an older entry
+TASK_LIST_EXPIRE = 30
+GENERATION_EXPIRE = 24 * 60 * 60
+
+_INITIAL_GENERATION = "0"
+
+_BACKEND_ERRORS = (RedisError, OSError)
+
+logger = logging.getLogger(__name__)
+
+
+def _backend() -> Optional[Backend]:
+    """The cache backend, or None while caching is disabled."""
+    if not FastAPICache.get_enable():
+        return None
+    return FastAPICache.get_backend()
+
+
+def _generation_key(user_id: int) -> str:
+    return f"{FastAPICache.get_prefix()}:user:{user_id}:generation"
+
+
+async def _user_generation(backend: Backend, user_id: int) -> str:
+    generation = await backend.get(_generation_key(user_id))
+    if generation is None:
+        return _INITIAL_GENERATION
+    if isinstance(generation, bytes):
+        return generation.decode()
+    return generation
+
+
+async def user_cache_key(
+    user_id: int, name: str, params: dict
+) -> Optional[str]:
+    """Build the cache key for one of a user's responses.
+
+    ``name`` identifies the endpoint and ``params`` holds every argument
+    that changes its output (filters, cursor, page size). Returns None
+    when the response shouldn't be cached.
+    """
+    backend = _backend()
+    if backend is None:
+        return None
+    try:
+        generation = await _user_generation(backend, user_id)
+    except _BACKEND_ERRORS:
+        logger.warning("Cache unavailable, serving uncached", exc_info=True)
+        return None
+    digest = hashlib.md5(f"{name}:{sorted(params.items())}".encode()).hexdigest()
+    return f"{FastAPICache.get_prefix()}:user:{user_id}:{generation}:{digest}"
+
+
+async def get_cached(key: Optional[str]) -> Optional[Any]:
+    """Return the cached value for ``key``, or None on a miss.
+
+    A backend error counts as a miss.
+    """
+    backend = _backend()
+    if key is None or backend is None:
+        return None
+    try:
+        value = await backend.get(key)
+    except _BACKEND_ERRORS:
+        logger.warning("Cache read failed for %s", key, exc_info=True)
+        return None
+    if value is None:
+        return None
+    return orjson.loads(value)
+
+
+async def set_cached(key: Optional[str], value: Any, expire: int) -> None:
+    """Cache ``value`` under ``key`` for ``expire`` seconds.
+
+    Values are stored as the JSON the client receives, so a cache hit
+    returns exactly what a fresh response would. A backend error leaves
+    the value uncached.
+    """
+    backend = _backend()
+    if key is None or backend is None:
+        return
+    try:
+        await backend.set(key, orjson.dumps(value).decode(), expire=expire)
+    except _BACKEND_ERRORS:
+        logger.warning("Cache write failed for %s", key, exc_info=True)
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Stop serving every cached response for a user.
+
+    The write this follows has already committed, so a backend error is
+    logged rather than raised; the stale entries expire on their own.
+    """
+    backend = _backend()
+    if backend is None:
+        return
+    try:
+        await backend.set(
+            _generation_key(user_id),
+            uuid.uuid4().hex,
+            expire=GENERATION_EXPIRE,
+        )
+    except _BACKEND_ERRORS:
+        logger.warning(
+            "Cache invalidation failed for user %s", user_id, exc_info=True
+        )
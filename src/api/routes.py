@@ -1,7 +1,12 @@
 """FastAPI route definitions."""
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import (
+    APIRouter, Body, Depends, HTTPException, Response, status, Query
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.base import get_db
 from src.models.user import User
@@ -11,8 +16,13 @@ from src.services.task_service import TaskService
 from src.api.schemas import (
     UserCreate, UserUpdate, UserResponse,
     TaskCreate, TaskUpdate, TaskResponse, TaskListResponse,
+    TaskBulkCreateResponse,
     user_to_response, task_to_response
 )
+from src.api.cache import (
+    TASK_LIST_EXPIRE, get_cached, invalidate_user, set_cached, user_cache_key
+)
+from src.utils.helpers import encode_cursor, decode_cursor
 
 router = APIRouter()
 
@@ -20,43 +30,56 @@ router = APIRouter()
 # ============== User Endpoints ==============
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Create a new user."""
     service = UserService(db)
 
     # Check if user already exists
-    if service.get_by_email(user.email):
+    conflict = await service.find_conflict(user.email, user.username)
+    if conflict == "email":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    if service.get_by_username(user.username):
+    if conflict == "username":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
 
-    db_user = service.create(user)
+    try:
+        db_user = await service.create(user)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email or username already registered"
+        )
     return user_to_response(db_user)
 
 
-@router.get("/users/", response_model=List[UserResponse])
-def list_users(
+# user_to_response already validates each row; response_model=None avoids a
+# second validation pass over the list while keeping the documented shape
+@router.get(
+    "/users/",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": List[UserResponse]}},
+)
+async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> List[dict]:
     """List all users with pagination."""
     service = UserService(db)
-    users = service.get_all(skip=skip, limit=limit)
+    users = await service.get_all(skip=skip, limit=limit)
     return [user_to_response(u) for u in users]
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get a user by ID."""
     service = UserService(db)
-    user = service.get_by_id(user_id)
+    user = await service.get_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,10 +89,14 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.patch("/users/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(
+    user_id: int,
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_db)
+):
     """Update a user."""
     service = UserService(db)
-    user = service.update(user_id, user_update)
+    user = await service.update(user_id, user_update)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,71 +106,168 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a user."""
     service = UserService(db)
-    if not service.delete(user_id):
+    try:
+        deleted = await service.delete(user_id)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User still owns tasks"
+        )
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    await invalidate_user(user_id)
 
 
 # ============== Task Endpoints ==============
 
 @router.post("/users/{user_id}/tasks/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-def create_task(user_id: int, task: TaskCreate, db: Session = Depends(get_db)):
+async def create_task(
+    user_id: int,
+    task: TaskCreate,
+    db: AsyncSession = Depends(get_db)
+):
     """Create a new task for a user."""
     user_service = UserService(db)
-    if not user_service.get_by_id(user_id):
+    if not await user_service.get_by_id(user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
     task_service = TaskService(db)
-    db_task = task_service.create(task, owner_id=user_id)
+    db_task = await task_service.create(task, owner_id=user_id)
+    await invalidate_user(user_id)
     return task_to_response(db_task)
 
 
-@router.get("/users/{user_id}/tasks/", response_model=TaskListResponse)
-def list_user_tasks(
+@router.post(
+    "/users/{user_id}/tasks/bulk",
+    response_model=TaskBulkCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_tasks(
+    user_id: int,
+    tasks: List[TaskCreate] = Body(..., min_items=1, max_items=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many tasks for a user in a single transaction.
+
+    The batch is capped so one request can't hold SQLite's write lock
+    for an unbounded insert.
+    """
+    user_service = UserService(db)
+    if not await user_service.get_by_id(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    task_service = TaskService(db)
+    created = await task_service.bulk_create(tasks, owner_id=user_id)
+    await invalidate_user(user_id)
+    return {"created": created}
+
+
+# Rows are built straight from the selected columns; response_model=None
+# skips re-validating every item while still documenting the shape
+@router.get(
+    "/users/{user_id}/tasks/",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": TaskListResponse}},
+)
+async def list_user_tasks(
     user_id: int,
+    response: Response,
     status_filter: Optional[TaskStatus] = None,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = None,
     per_page: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List tasks for a user with optional status filter."""
+    """List tasks for a user with optional status filter.
+
+    Pass the ``next_cursor`` from the previous response to get the next page.
+    Responses are cached server-side per user and dropped whenever one of
+    their tasks changes; clients are told not to reuse them unchecked.
+    """
+    response.headers["Cache-Control"] = "no-cache"
+    cache_key = await user_cache_key(
+        user_id,
+        "list_user_tasks",
+        {"status_filter": status_filter, "cursor": cursor, "per_page": per_page},
+    )
+    cached = await get_cached(cache_key)
+    if cached is not None:
+        return cached
+
     user_service = UserService(db)
-    if not user_service.get_by_id(user_id):
+    if not await user_service.get_by_id(user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
     task_service = TaskService(db)
-    skip = (page - 1) * per_page
-    tasks, total = task_service.get_by_owner(
+    tasks, total = await task_service.get_rows_by_owner(
         owner_id=user_id,
         status_filter=status_filter,
-        skip=skip,
+        cursor=position,
         limit=per_page
     )
 
-    return TaskListResponse(
-        tasks=[task_to_response(t) for t in tasks],
-        total=total,
-        page=page,
-        per_page=per_page
-    )
+    next_cursor = None
+    if len(tasks) == per_page:
+        next_cursor = encode_cursor(tasks[-1]["created_at"], tasks[-1]["id"])
+
+    result = {
+        "tasks": tasks,
+        "total": total,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+    }
+    await set_cached(cache_key, result, expire=TASK_LIST_EXPIRE)
+    return result
+
+
+@router.get("/users/{user_id}/tasks/export")
+async def export_user_tasks(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Stream all tasks for a user as newline-delimited JSON."""
+    user_service = UserService(db)
+    if not await user_service.get_by_id(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    task_service = TaskService(db)
+
+    async def ndjson_lines():
+        async for task in task_service.stream_by_owner(user_id):
+            yield orjson.dumps(task) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)):
+async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Get a task by ID."""
     task_service = TaskService(db)
-    task = task_service.get_by_id(task_id)
+    task = await task_service.get_by_id(task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,45 +277,54 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
 
 
 @router.patch("/tasks/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
+async def update_task(
+    task_id: int,
+    task_update: TaskUpdate,
+    db: AsyncSession = Depends(get_db)
+):
     """Update a task."""
     task_service = TaskService(db)
-    task = task_service.update(task_id, task_update)
+    task = await task_service.update(task_id, task_update)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    await invalidate_user(task.owner_id)
     return task_to_response(task)
 
 
 @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a task."""
     task_service = TaskService(db)
-    if not task_service.delete(task_id):
+    # The owner is needed to clear their cached task lists
+    owner_id = await task_service.get_owner_id(task_id)
+    if owner_id is None or not await task_service.delete(task_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    await invalidate_user(owner_id)
 
 
 @router.post("/tasks/{task_id}/complete", response_model=TaskResponse)
-def complete_task(task_id: int, db: Session = Depends(get_db)):
+async def complete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Mark a task as completed."""
     task_service = TaskService(db)
-    task = task_service.mark_completed(task_id)
+    task = await task_service.mark_completed(task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    await invalidate_user(task.owner_id)
     return task_to_response(task)
 
 
 # ============== Health Check ==============
 
 @router.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "version": "1.0.0"}
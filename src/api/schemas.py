@@ -110,8 +110,13 @@ class TaskListResponse(BaseModel):
     """Response schema for list of tasks."""
     tasks: List[TaskResponse]
     total: int
-    page: int
     per_page: int
+    next_cursor: Optional[str] = None
+
+
+class TaskBulkCreateResponse(BaseModel):
+    """Response schema for a bulk task import."""
+    created: int
 
 
 # ============== Auth Schemas ==============
@@ -147,3 +152,13 @@ def task_to_response(task_obj) -> dict:
     """
     task_schema = TaskInDB.from_orm(task_obj)  # v1 syntax
     return task_schema.dict()  # v1 syntax - breaks in v2
+
+
+def set_fields(schema: BaseModel) -> dict:
+    """Return only the fields that were explicitly set on a schema.
+
+    Same result as .dict(exclude_unset=True) for flat schemas such as the
+    update payloads, without walking and copying every field.
+    Uses Pydantic v1's __fields_set__ - becomes model_fields_set in v2
+    """
+    return {name: getattr(schema, name) for name in schema.__fields_set__}
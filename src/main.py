@@ -1,19 +1,25 @@
 """FastAPI application entry point."""
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 
+from src.api.cache import CACHE_PREFIX
 from src.api.routes import router
 from src.models.base import Base, engine
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(
     title="TaskFlow API",
     description="Enterprise Task Management API - Demo Application",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -29,8 +35,32 @@ app.add_middleware(
 app.include_router(router, prefix="/api/v1", tags=["api"])
 
 
+@app.on_event("startup")
+async def create_tables():
+    """Create database tables."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@app.on_event("startup")
+async def init_cache():
+    """Set up the response cache, which only runs when REDIS_URL is set.
+
+    An in-process store would never evict superseded generations, and a
+    write in one worker couldn't invalidate another worker's copies, so
+    without Redis the cache is left disabled.
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        FastAPICache.init(
+            RedisBackend(aioredis.from_url(redis_url)), prefix=CACHE_PREFIX
+        )
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX, enable=False)
+
+
 @app.get("/")
-def root():
+async def root():
     """Root endpoint."""
     return {
         "name": "TaskFlow API",
@@ -1,6 +1,9 @@
 """Task model for SQLAlchemy."""
 import enum
-from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey, DateTime
+from sqlalchemy import (
+    Column, Integer, String, Text, Enum, ForeignKey, DateTime, Index
+)
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -25,12 +28,38 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, nullable=False)
     priority = Column(Integer, default=1)  # 1-5, 5 being highest
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # SQLite's CURRENT_TIMESTAMP has no fractional seconds; store bound values
+    # the same way so keyset comparisons on created_at line up exactly
+    created_at = Column(
+        DateTime(timezone=True).with_variant(
+            sqlite.DATETIME(truncate_microseconds=True), "sqlite"
+        ),
+        server_default=func.now(),
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     due_date = Column(DateTime(timezone=True), nullable=True)
 
-    # Relationship to user
-    owner = relationship("User", back_populates="tasks")
+    # Relationship to user; many-to-one, so joining it in costs no extra query
+    owner = relationship("User", back_populates="tasks", lazy="joined")
 
     def __repr__(self):
         return f"<Task(id={self.id}, title='{self.title}', status='{self.status}')>"
+
+
+# Serves keyset pagination of a user's tasks (newest first)
+Index(
+    "ix_tasks_owner_created_id",
+    Task.owner_id,
+    Task.created_at.desc(),
+    Task.id.desc(),
+)
+
+# Same ordering when filtered by status; the (owner_id, status) prefix also
+# lets get_stats group by status without touching the table
+Index(
+    "ix_tasks_owner_status_created",
+    Task.owner_id,
+    Task.status,
+    Task.created_at.desc(),
+    Task.id.desc(),
+)
@@ -1,45 +1,166 @@
 """Task service for business logic."""
-from typing import Optional, List, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Sequence, Tuple
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    bindparam, delete, func, insert, lambda_stmt, select, tuple_, update
+)
+from sqlalchemy.orm import raiseload, selectinload
 
 from src.models.task import Task, TaskStatus
-from src.api.schemas import TaskCreate, TaskUpdate
+from src.api.schemas import TaskCreate, TaskUpdate, set_fields
+
+# Columns exposed by task responses, for queries that skip the ORM
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.priority,
+    Task.owner_id,
+    Task.created_at,
+    Task.updated_at,
+    Task.due_date,
+)
+TASK_COLUMN_KEYS = tuple(column.key for column in TASK_COLUMNS)
+
+_ZERO_STATS = {status.value: 0 for status in TaskStatus}
+
+# Built once; lambda_stmt caches the construct so lookups only bind the id
+_BY_ID = lambda_stmt(lambda: select(Task).where(Task.id == bindparam("id")))
 
 
 class TaskService:
     """Service class for task operations."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, task_id: int) -> Optional[Task]:
+    async def get_by_id(self, task_id: int) -> Optional[Task]:
         """Get task by ID."""
-        return self.db.query(Task).filter(Task.id == task_id).first()
+        result = await self.db.execute(_BY_ID, {"id": task_id})
+        return result.scalar_one_or_none()
+
+    async def get_owner_id(self, task_id: int) -> Optional[int]:
+        """Get only a task's owner id, without loading the task or owner."""
+        owner_id: Optional[int] = await self.db.scalar(
+            select(Task.owner_id).where(Task.id == task_id)
+        )
+        return owner_id
 
-    def get_by_owner(
+    async def get_by_owner(
         self,
         owner_id: int,
         status_filter: Optional[TaskStatus] = None,
-        skip: int = 0,
+        cursor: Optional[Tuple[datetime, int]] = None,
         limit: int = 20
     ) -> Tuple[List[Task], int]:
-        """Get tasks by owner with optional status filter."""
-        query = self.db.query(Task).filter(Task.owner_id == owner_id)
+        """Get tasks by owner with optional status filter.
+
+        Tasks are returned newest first. Passing the (created_at, id) of the
+        last task seen as ``cursor`` seeks straight to the next page instead
+        of scanning past an OFFSET. The total is computed in the same
+        statement, so a list page costs a single round trip.
+        """
+        # Every row shares one owner, so load it once rather than join per row
+        rows, total = await self._page_by_owner(
+            (Task,), owner_id, status_filter, cursor, limit,
+            options=(selectinload(Task.owner), raiseload("*")),
+        )
+        return [row.Task for row in rows], total
 
+    async def get_rows_by_owner(
+        self,
+        owner_id: int,
+        status_filter: Optional[TaskStatus] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        limit: int = 20
+    ) -> Tuple[List[dict], int]:
+        """Same page as get_by_owner, as plain dicts of the task columns.
+
+        Skips ORM instance construction and relationship loading for
+        callers that only serialize the rows.
+        """
+        rows, total = await self._page_by_owner(
+            TASK_COLUMNS, owner_id, status_filter, cursor, limit
+        )
+        return [dict(zip(TASK_COLUMN_KEYS, row)) for row in rows], total
+
+    async def stream_by_owner(
+        self, owner_id: int, chunk_size: int = 500
+    ) -> AsyncIterator[dict]:
+        """Stream all of an owner's tasks as plain dicts, newest first.
+
+        Rows are fetched ``chunk_size`` at a time, so memory stays bounded
+        no matter how many tasks the owner has.
+        """
+        result = await self.db.stream(
+            select(*TASK_COLUMNS)
+            .where(Task.owner_id == owner_id)
+            .order_by(Task.created_at.desc(), Task.id.desc())
+            .execution_options(yield_per=chunk_size)
+        )
+        async for row in result.mappings():
+            yield dict(row)
+
+    async def _page_by_owner(
+        self,
+        entities: Sequence,
+        owner_id: int,
+        status_filter: Optional[TaskStatus],
+        cursor: Optional[Tuple[datetime, int]],
+        limit: int,
+        options: Sequence = (),
+    ) -> Tuple[List[Row], int]:
+        """Select one keyset page of an owner's tasks plus the total."""
+        filters = [Task.owner_id == owner_id]
         if status_filter:
-            query = query.filter(Task.status == status_filter)
+            filters.append(Task.status == status_filter)
+
+        # The total ignores the cursor, so it can't be a window over the page
+        total = (
+            select(func.count(Task.id))
+            .where(*filters)
+            .correlate(None)
+            .scalar_subquery()
+        )
+        query = (
+            select(*entities, total.label("total"))
+            .where(*filters)
+            .options(*options)
+        )
+        if cursor:
+            query = query.where(tuple_(Task.created_at, Task.id) < cursor)
 
-        total = query.count()
-        tasks = query.order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+        )
+        rows = result.all()
+
+        if rows:
+            return rows, rows[0].total
 
-        return tasks, total
+        # Totals only come back with rows; fall back to a plain count when
+        # the cursor points past the last task
+        total = 0
+        if cursor:
+            total = await self.db.scalar(
+                select(func.count(Task.id)).where(*filters)
+            )
+        return [], total
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[Task]:
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Task]:
         """Get all tasks with pagination."""
-        return self.db.query(Task).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(Task)
+            .options(selectinload(Task.owner), raiseload("*"))
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
 
-    def create(self, task_data: TaskCreate, owner_id: int) -> Task:
+    async def create(self, task_data: TaskCreate, owner_id: int) -> Task:
         """Create a new task."""
         # Using Pydantic v1's .dict() - WILL BREAK in v2
         task_dict = task_data.dict()
@@ -51,58 +172,83 @@ class TaskService:
         )
 
         self.db.add(db_task)
-        self.db.commit()
-        self.db.refresh(db_task)
+        await self.db.commit()
+        # SQLite can't RETURNING under 1.4; fetch just the columns the
+        # database filled in rather than the whole row plus joined owner
+        await self.db.refresh(db_task, ["created_at", "updated_at"])
         return db_task
 
-    def update(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
-        """Update an existing task."""
-        db_task = self.get_by_id(task_id)
-        if not db_task:
-            return None
+    async def bulk_create(self, tasks: List[TaskCreate], owner_id: int) -> int:
+        """Create many tasks in one INSERT and one commit.
 
-        # Using Pydantic v1's .dict() - WILL BREAK in v2
-        update_data = task_data.dict(exclude_unset=True)
-
-        for field, value in update_data.items():
-            setattr(db_task, field, value)
-
-        self.db.commit()
-        self.db.refresh(db_task)
-        return db_task
+        Returns the number of tasks created.
+        """
+        if not tasks:
+            return 0
 
-    def delete(self, task_id: int) -> bool:
-        """Delete a task."""
-        db_task = self.get_by_id(task_id)
-        if not db_task:
-            return False
-
-        self.db.delete(db_task)
-        self.db.commit()
-        return True
+        # Using Pydantic v1's .dict() - WILL BREAK in v2
+        rows = [
+            {**task_data.dict(), "owner_id": owner_id, "status": TaskStatus.PENDING}
+            for task_data in tasks
+        ]
+        await self.db.execute(insert(Task), rows)
+        await self.db.commit()
+        return len(rows)
+
+    async def update(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
+        """Update an existing task."""
+        update_data = set_fields(task_data)
+        if not update_data:
+            return await self.get_by_id(task_id)
+
+        return await self._update_values(task_id, **update_data)
+
+    async def delete(self, task_id: int) -> bool:
+        """Delete a task with a single DELETE; False if it did not exist."""
+        result = await self.db.execute(
+            delete(Task)
+            .where(Task.id == task_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        deleted: bool = result.rowcount > 0
+        return deleted
 
-    def mark_completed(self, task_id: int) -> Optional[Task]:
+    async def mark_completed(self, task_id: int) -> Optional[Task]:
         """Mark a task as completed."""
-        db_task = self.get_by_id(task_id)
-        if not db_task:
+        return await self._update_values(task_id, status=TaskStatus.COMPLETED)
+
+    async def _update_values(self, task_id: int, **values) -> Optional[Task]:
+        """Apply ``values`` with a single UPDATE and return the fresh task.
+
+        SQLAlchemy 1.4 cannot emit RETURNING on SQLite, so the row is read
+        back with one SELECT instead of a load-mutate-refresh cycle.
+        """
+        result = await self.db.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
             return None
 
-        db_task.status = TaskStatus.COMPLETED
-        self.db.commit()
-        self.db.refresh(db_task)
-        return db_task
+        result = await self.db.execute(
+            _BY_ID, {"id": task_id}, execution_options={"populate_existing": True}
+        )
+        await self.db.commit()
+        task: Task = result.scalar_one()
+        return task
 
-    def get_stats(self, owner_id: int) -> dict:
+    async def get_stats(self, owner_id: int) -> dict:
         """Get task statistics for a user."""
-        query = self.db.query(
+        query = select(
             Task.status,
             func.count(Task.id).label('count')
-        ).filter(Task.owner_id == owner_id).group_by(Task.status)
-
-        results = query.all()
+        ).where(Task.owner_id == owner_id).group_by(Task.status)
 
-        stats = {status.value: 0 for status in TaskStatus}
-        for status, count in results:
-            stats[status.value] = count
+        results = (await self.db.execute(query)).all()
 
+        stats = _ZERO_STATS.copy()
+        stats.update({status.value: count for status, count in results})
         return stats
@@ -1,39 +1,88 @@
 """User service for business logic."""
+import asyncio
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, lambda_stmt, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 
 from src.models.user import User
-from src.api.schemas import UserCreate, UserUpdate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.api.schemas import UserCreate, UserUpdate, set_fields
+
+# argon2id with the OWASP minimum profile (19 MiB, 2 passes); bcrypt stays
+# listed so hashes created before the switch still verify
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
+
+# Hot lookups built once; lambda_stmt caches the construct and its cache
+# key, so each call only binds parameters
+_BY_ID = lambda_stmt(lambda: select(User).where(User.id == bindparam("id")))
+_BY_EMAIL = lambda_stmt(
+    lambda: select(User).where(User.email == bindparam("email"))
+)
+_BY_USERNAME = lambda_stmt(
+    lambda: select(User).where(User.username == bindparam("username"))
+)
 
 
 class UserService:
     """Service class for user operations."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, user_id: int) -> Optional[User]:
+    async def get_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await self.db.execute(_BY_ID, {"id": user_id})
+        return result.scalar_one_or_none()
 
-    def get_by_email(self, email: str) -> Optional[User]:
+    async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(_BY_EMAIL, {"email": email})
+        return result.scalar_one_or_none()
 
-    def get_by_username(self, username: str) -> Optional[User]:
+    async def get_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
-        return self.db.query(User).filter(User.username == username).first()
-
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
+        result = await self.db.execute(_BY_USERNAME, {"username": username})
+        return result.scalar_one_or_none()
+
+    async def find_conflict(self, email: str, username: str) -> Optional[str]:
+        """Return which unique field is already taken, checked in one query.
+
+        Returns "email", "username" or None. Email wins if both are taken.
+        """
+        result = await self.db.execute(
+            select(User.email, User.username).where(
+                or_(User.email == email, User.username == username)
+            )
+        )
+        rows = result.all()
+        if any(row.email == email for row in rows):
+            return "email"
+        if rows:
+            return "username"
+        return None
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
         """Get all users with pagination."""
-        return self.db.query(User).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            select(User).options(raiseload("*")).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
 
-    def create(self, user_data: UserCreate) -> User:
+    async def create(self, user_data: UserCreate) -> User:
         """Create a new user."""
-        hashed_password = pwd_context.hash(user_data.password)
+        # Hashing is CPU-bound; keep it off the event loop
+        hashed_password = await asyncio.to_thread(
+            pwd_context.hash, user_data.password
+        )
 
         db_user = User(
             email=user_data.email,
@@ -43,45 +92,64 @@ class UserService:
         )
 
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent signup for the same email/username
+            await self.db.rollback()
+            raise
+        # Only the timestamps are database-generated
+        await self.db.refresh(db_user, ["created_at", "updated_at"])
         return db_user
 
-    def update(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+    async def update(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         """Update an existing user."""
-        db_user = self.get_by_id(user_id)
+        db_user = await self.get_by_id(user_id)
         if not db_user:
             return None
 
-        # Using Pydantic v1's .dict() - WILL BREAK in v2
-        update_data = user_data.dict(exclude_unset=True)
+        update_data = set_fields(user_data)
 
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         return db_user
 
-    def delete(self, user_id: int) -> bool:
-        """Delete a user."""
-        db_user = self.get_by_id(user_id)
-        if not db_user:
-            return False
-
-        self.db.delete(db_user)
-        self.db.commit()
-        return True
-
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def delete(self, user_id: int) -> bool:
+        """Delete a user with a single DELETE; False if it did not exist.
+
+        The tasks relationship is not loaded, so the foreign key is what
+        stops a user who still owns tasks from being removed; that raises
+        IntegrityError.
+        """
+        try:
+            result = await self.db.execute(
+                delete(User)
+                .where(User.id == user_id)
+                .execution_options(synchronize_session=False)
+            )
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        await self.db.commit()
+        deleted: bool = result.rowcount > 0
+        return deleted
+
+    async def verify_password(
+        self, plain_password: str, hashed_password: str
+    ) -> bool:
         """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return await asyncio.to_thread(
+            pwd_context.verify, plain_password, hashed_password
+        )
 
-    def authenticate(self, username: str, password: str) -> Optional[User]:
+    async def authenticate(self, username: str, password: str) -> Optional[User]:
         """Authenticate a user by username and password."""
-        user = self.get_by_username(username)
+        user = await self.get_by_username(username)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
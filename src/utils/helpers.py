@@ -1,19 +1,27 @@
 """Utility helper functions."""
+import base64
 import re
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 import httpx
 
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_SLUG_WHITESPACE_RE = re.compile(r'\s+')
+_SLUG_INVALID_RE = re.compile(r'[^a-z0-9-]')
+_SLUG_HYPHENS_RE = re.compile(r'-+')
+
+_UTC = timezone.utc
+_MAX_ID = 2 ** 63
+
 
 def validate_email_format(email: str) -> bool:
     """Validate email format using regex."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 
 def calculate_due_date(days_from_now: int) -> datetime:
-    """Calculate a due date from current time."""
-    return datetime.utcnow() + timedelta(days=days_from_now)
+    """Calculate a timezone-aware UTC due date from current time."""
+    return datetime.now(_UTC) + timedelta(days=days_from_now)
 
 
 def format_datetime(dt: Optional[datetime]) -> Optional[str]:
@@ -28,6 +36,29 @@ def parse_datetime(dt_string: str) -> datetime:
     return datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
 
 
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque pagination cursor."""
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a pagination cursor back into (created_at, id).
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, raw_id = raw.rsplit("|", 1)
+        item_id = int(raw_id)
+        # Ids must fit a signed 64-bit integer or the database can't bind them
+        if not 0 < item_id < _MAX_ID:
+            raise ValueError("Cursor id out of range")
+        return parse_datetime(created_at), item_id
+    except ValueError as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
 async def fetch_external_data(url: str, timeout: float = 10.0) -> dict:
     """Fetch data from external URL using httpx.
 
@@ -54,11 +85,11 @@ def generate_slug(title: str) -> str:
     # Convert to lowercase
     slug = title.lower()
     # Replace spaces with hyphens
-    slug = re.sub(r'\s+', '-', slug)
+    slug = _SLUG_WHITESPACE_RE.sub('-', slug)
     # Remove non-alphanumeric characters except hyphens
-    slug = re.sub(r'[^a-z0-9-]', '', slug)
+    slug = _SLUG_INVALID_RE.sub('', slug)
     # Remove multiple consecutive hyphens
-    slug = re.sub(r'-+', '-', slug)
+    slug = _SLUG_HYPHENS_RE.sub('-', slug)
     # Remove leading/trailing hyphens
     slug = slug.strip('-')
     return slug
@@ -1,52 +1,133 @@
 """Pytest configuration and fixtures."""
+import asyncio
+import os
+
+import httpx
 import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from passlib.context import CryptContext
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from fastapi.testclient import TestClient
 
-from src.models.base import Base, get_db
-from src.main import app
+# Give each xdist worker its own database file, and point the app's engine
+# at it before src is imported, so parallel runs never share a database
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEST_DB_PATH = f"./test_{_WORKER}.db" if _WORKER else "./test.db"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
+# Workers would otherwise share cached responses through Redis
+os.environ.pop("REDIS_URL", None)
 
+from src.api.cache import CACHE_PREFIX  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models.base import Base  # noqa: E402
+from src.services import user_service  # noqa: E402
 
-# Use in-memory SQLite for tests
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Use a file-backed SQLite for tests
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
+# Sync engine for schema setup and resets only; requests go through the
+# app's own engine and get_db, with its production connection settings
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False}
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Same schemes as production at their minimum cost; hashing at real cost
+# dominated the runtime of every test that creates a user
+FAST_PWD_CONTEXT = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=8,
+    argon2__time_cost=1,
+    argon2__parallelism=1,
+    bcrypt__rounds=4,
+)
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hashing(monkeypatch):
+    """Use the cheap password context for every test."""
+    monkeypatch.setattr(user_service, "pwd_context", FAST_PWD_CONTEXT)
+
+
+def _delete_all_rows(conn):
+    """Delete every row, children before parents, on a sync connection."""
+    for table in reversed(Base.metadata.sorted_tables):
+        conn.execute(table.delete())
+
+
+@pytest.fixture(scope="session")
+def empty_tables():
+    """The row-deleting reset, for fixtures that manage their own engine.
+
+    Async callers pass it to ``AsyncConnection.run_sync``.
+    """
+    return _delete_all_rows
 
 
-@pytest.fixture(scope="function")
-def db():
-    """Create a fresh database for each test."""
+@pytest.fixture(scope="session")
+def sync_engine():
+    """Create the schema once per session and yield its sync engine."""
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
     try:
-        yield db
+        yield engine
     finally:
-        db.close()
         Base.metadata.drop_all(bind=engine)
+        if _WORKER:
+            engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(TEST_DB_PATH + suffix):
+                    os.remove(TEST_DB_PATH + suffix)
 
 
-@pytest.fixture(scope="function")
-def client(db):
-    """Create a test client with database override."""
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            pass
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the session, shared with the session-wide client."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
+
+@pytest.fixture(scope="session")
+async def client(sync_engine):
+    """Create one async test client, and run app startup once, per session.
+
+    ASGITransport doesn't drive the lifespan, so startup and shutdown are
+    run here. Tests can overlap independent requests with asyncio.gather.
+    """
+    await app.router.startup()
+    # Without REDIS_URL the app runs uncached; give the tests an in-process
+    # backend so they still cover caching, and _db_reset empties it
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as test_client:
         yield test_client
-    app.dependency_overrides.clear()
+    await app.router.shutdown()
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+async def _db_reset(request):
+    """Empty the tables and the response cache after each client test.
+
+    The app commits through its own aiosqlite connections, so there is no
+    outer transaction to roll back; deleting the rows is the cheap reset.
+    """
+    yield
+    if "client" not in request.fixturenames:
+        return
+    with engine.begin() as conn:
+        _delete_all_rows(conn)
+    await FastAPICache.clear()
+
+
+# The sample payloads are built once per session; tests read them and copy
+# before changing anything
+
+@pytest.fixture(scope="session")
 def sample_user_data():
     """Sample user data for tests."""
     return {
@@ -58,6 +139,12 @@ def sample_user_data():
 
 
 @pytest.fixture
+def dup_user_data(sample_user_data):
+    """A different user reusing sample_user_data's email."""
+    return {**sample_user_data, "username": "otheruser"}
+
+
+@pytest.fixture(scope="session")
 def sample_task_data():
     """Sample task data for tests."""
     return {
@@ -1,25 +1,43 @@
 """Integration tests for the API endpoints."""
+import asyncio
+import base64
+import json
+
 import pytest
 from fastapi import status
+from fastapi_cache import FastAPICache
+from redis.exceptions import RedisError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.models.base import engine
 
 
 class TestHealthEndpoint:
     """Tests for health check endpoint."""
 
-    def test_health_check(self, client):
+    async def test_health_check(self, client):
         """Test health endpoint returns healthy status."""
-        response = client.get("/api/v1/health")
+        response = await client.get("/api/v1/health")
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["status"] == "healthy"
 
 
+class TestDatabaseEngine:
+    """Tests for the app's database engine."""
+
+    def test_sqlite_pool_is_bounded(self):
+        """Test file SQLite doesn't get the dialect's unbounded NullPool."""
+        assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+        assert engine.pool.size() == 5
+
+
 class TestUserEndpoints:
     """Tests for user API endpoints."""
 
-    def test_create_user(self, client, sample_user_data):
+    async def test_create_user(self, client, sample_user_data):
         """Test creating a new user."""
-        response = client.post("/api/v1/users/", json=sample_user_data)
+        response = await client.post("/api/v1/users/", json=sample_user_data)
         assert response.status_code == status.HTTP_201_CREATED
         data = response.json()
         assert data["email"] == sample_user_data["email"]
@@ -27,70 +45,97 @@ class TestUserEndpoints:
         assert "id" in data
         assert "password" not in data  # Password should not be returned
 
-    def test_create_user_duplicate_email(self, client, sample_user_data):
+    async def test_create_user_duplicate_email(
+        self, client, sample_user_data, dup_user_data
+    ):
         """Test creating user with duplicate email fails."""
-        client.post("/api/v1/users/", json=sample_user_data)
-        response = client.post("/api/v1/users/", json=sample_user_data)
+        await client.post("/api/v1/users/", json=sample_user_data)
+        response = await client.post("/api/v1/users/", json=dup_user_data)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        assert "Email already registered" in response.json()["detail"]
+        assert response.json()["detail"] == "Email already registered"
 
-    def test_get_user(self, client, sample_user_data):
+    async def test_create_user_duplicate_username(self, client, sample_user_data):
+        """Test creating user with duplicate username fails."""
+        await client.post("/api/v1/users/", json=sample_user_data)
+        duplicate = {**sample_user_data, "email": "other@example.com"}
+        response = await client.post("/api/v1/users/", json=duplicate)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "Username already taken"
+
+    async def test_get_user(self, client, sample_user_data):
         """Test getting a user by ID."""
-        create_response = client.post("/api/v1/users/", json=sample_user_data)
+        create_response = await client.post("/api/v1/users/", json=sample_user_data)
         user_id = create_response.json()["id"]
 
-        response = client.get(f"/api/v1/users/{user_id}")
+        response = await client.get(f"/api/v1/users/{user_id}")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["id"] == user_id
 
-    def test_get_user_not_found(self, client):
+    async def test_get_user_not_found(self, client):
         """Test getting non-existent user returns 404."""
-        response = client.get("/api/v1/users/99999")
+        response = await client.get("/api/v1/users/99999")
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
-    def test_list_users(self, client, sample_user_data):
+    async def test_list_users(self, client, sample_user_data):
         """Test listing all users."""
-        client.post("/api/v1/users/", json=sample_user_data)
-        response = client.get("/api/v1/users/")
+        await client.post("/api/v1/users/", json=sample_user_data)
+        response = await client.get("/api/v1/users/")
         assert response.status_code == status.HTTP_200_OK
         assert isinstance(response.json(), list)
         assert len(response.json()) >= 1
+        assert "hashed_password" not in response.json()[0]
 
-    def test_update_user(self, client, sample_user_data):
+    async def test_update_user(self, client, sample_user_data):
         """Test updating a user."""
-        create_response = client.post("/api/v1/users/", json=sample_user_data)
+        create_response = await client.post("/api/v1/users/", json=sample_user_data)
         user_id = create_response.json()["id"]
 
         update_data = {"full_name": "Updated Name"}
-        response = client.patch(f"/api/v1/users/{user_id}", json=update_data)
+        response = await client.patch(f"/api/v1/users/{user_id}", json=update_data)
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["full_name"] == "Updated Name"
 
-    def test_delete_user(self, client, sample_user_data):
+    async def test_delete_user(self, client, sample_user_data):
         """Test deleting a user."""
-        create_response = client.post("/api/v1/users/", json=sample_user_data)
+        create_response = await client.post("/api/v1/users/", json=sample_user_data)
         user_id = create_response.json()["id"]
 
-        response = client.delete(f"/api/v1/users/{user_id}")
+        response = await client.delete(f"/api/v1/users/{user_id}")
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
         # Verify user is deleted
-        get_response = client.get(f"/api/v1/users/{user_id}")
+        get_response = await client.get(f"/api/v1/users/{user_id}")
         assert get_response.status_code == status.HTTP_404_NOT_FOUND
 
 
+    async def test_delete_user_with_tasks(
+        self, client, sample_user_data, sample_task_data
+    ):
+        """Test deleting a user who still owns tasks is a conflict."""
+        create_response = await client.post("/api/v1/users/", json=sample_user_data)
+        user_id = create_response.json()["id"]
+        await client.post(f"/api/v1/users/{user_id}/tasks/", json=sample_task_data)
+
+        response = await client.delete(f"/api/v1/users/{user_id}")
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.json()["detail"] == "User still owns tasks"
+
+        get_response = await client.get(f"/api/v1/users/{user_id}")
+        assert get_response.status_code == status.HTTP_200_OK
+
+
 class TestTaskEndpoints:
     """Tests for task API endpoints."""
 
     @pytest.fixture
-    def created_user(self, client, sample_user_data):
+    async def created_user(self, client, sample_user_data):
         """Create a user and return their ID."""
-        response = client.post("/api/v1/users/", json=sample_user_data)
+        response = await client.post("/api/v1/users/", json=sample_user_data)
         return response.json()["id"]
 
-    def test_create_task(self, client, created_user, sample_task_data):
+    async def test_create_task(self, client, created_user, sample_task_data):
         """Test creating a new task."""
-        response = client.post(
+        response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
@@ -100,86 +145,253 @@ class TestTaskEndpoints:
         assert data["status"] == "pending"
         assert data["owner_id"] == created_user
 
-    def test_create_task_for_nonexistent_user(self, client, sample_task_data):
+    async def test_create_task_for_nonexistent_user(self, client, sample_task_data):
         """Test creating task for non-existent user fails."""
-        response = client.post("/api/v1/users/99999/tasks/", json=sample_task_data)
+        response = await client.post(
+            "/api/v1/users/99999/tasks/", json=sample_task_data
+        )
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
-    def test_get_task(self, client, created_user, sample_task_data):
+    async def test_concurrent_create_tasks(
+        self, client, created_user, sample_task_data
+    ):
+        """Test concurrent writers all succeed instead of hitting a locked db."""
+        url = f"/api/v1/users/{created_user}/tasks/"
+        responses = await asyncio.gather(
+            *(client.post(url, json=sample_task_data) for _ in range(50))
+        )
+        assert [r.status_code for r in responses] == [
+            status.HTTP_201_CREATED
+        ] * 50
+
+    async def test_bulk_create_tasks(self, client, created_user, sample_task_data):
+        """Test creating several tasks in one request."""
+        response = await client.post(
+            f"/api/v1/users/{created_user}/tasks/bulk",
+            json=[sample_task_data, {"title": "Second task"}]
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {"created": 2}
+
+        listing = (await client.get(f"/api/v1/users/{created_user}/tasks/")).json()
+        assert listing["total"] == 2
+
+    @pytest.mark.parametrize("count", [0, 501])
+    async def test_bulk_create_tasks_batch_size_limits(
+        self, client, created_user, count
+    ):
+        """Test empty and oversized batches are rejected."""
+        response = await client.post(
+            f"/api/v1/users/{created_user}/tasks/bulk",
+            json=[{"title": f"Task {i}"} for i in range(count)]
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_bulk_create_tasks_for_nonexistent_user(
+        self, client, sample_task_data
+    ):
+        """Test bulk creating tasks for non-existent user fails."""
+        response = await client.post(
+            "/api/v1/users/99999/tasks/bulk", json=[sample_task_data]
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_get_task(self, client, created_user, sample_task_data):
         """Test getting a task by ID."""
-        create_response = client.post(
+        create_response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
         task_id = create_response.json()["id"]
 
-        response = client.get(f"/api/v1/tasks/{task_id}")
+        response = await client.get(f"/api/v1/tasks/{task_id}")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["id"] == task_id
 
-    def test_list_user_tasks(self, client, created_user, sample_task_data):
+    async def test_list_user_tasks(self, client, created_user, sample_task_data):
         """Test listing tasks for a user."""
-        client.post(f"/api/v1/users/{created_user}/tasks/", json=sample_task_data)
+        create_response = await client.post(
+            f"/api/v1/users/{created_user}/tasks/",
+            json=sample_task_data
+        )
 
-        response = client.get(f"/api/v1/users/{created_user}/tasks/")
+        response = await client.get(f"/api/v1/users/{created_user}/tasks/")
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert "tasks" in data
         assert "total" in data
         assert len(data["tasks"]) >= 1
+        # List items keep the same shape as single-task responses
+        assert data["tasks"][0] == create_response.json()
+
+    async def test_list_user_tasks_cache_cleared_on_write(
+        self, client, created_user, sample_task_data
+    ):
+        """Test cached task lists are invalidated by task writes."""
+        url = f"/api/v1/users/{created_user}/tasks/"
+        create_response = await client.post(url, json=sample_task_data)
+        task_id = create_response.json()["id"]
+        assert (await client.get(url)).json()["total"] == 1
+
+        await client.post(url, json=sample_task_data)
+        assert (await client.get(url)).json()["total"] == 2
+
+        await client.post(f"/api/v1/tasks/{task_id}/complete")
+        tasks = (await client.get(url)).json()["tasks"]
+        statuses = {t["id"]: t["status"] for t in tasks}
+        assert statuses[task_id] == "completed"
+
+        await client.delete(f"/api/v1/tasks/{task_id}")
+        assert (await client.get(url)).json()["total"] == 1
+
+    async def test_list_user_tasks_not_cacheable_by_clients(
+        self, client, created_user
+    ):
+        """Test browsers are told to revalidate cached task lists."""
+        url = f"/api/v1/users/{created_user}/tasks/"
+        for _ in range(2):  # miss, then server-side hit
+            response = await client.get(url)
+            assert response.headers["cache-control"] == "no-cache"
+            assert "etag" not in response.headers
+
+    async def test_list_user_tasks_survives_cache_errors(
+        self, client, created_user, sample_task_data, monkeypatch
+    ):
+        """Test a failing cache backend falls back to the database."""
+        async def unavailable(*args, **kwargs):
+            raise RedisError("connection refused")
+
+        backend = FastAPICache.get_backend()
+        monkeypatch.setattr(backend, "get", unavailable)
+        monkeypatch.setattr(backend, "set", unavailable)
+
+        url = f"/api/v1/users/{created_user}/tasks/"
+        assert (await client.post(url, json=sample_task_data)).status_code == (
+            status.HTTP_201_CREATED
+        )
+        response = await client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total"] == 1
+
+    async def test_list_user_tasks_cursor_pagination(
+        self, client, created_user, sample_task_data
+    ):
+        """Test paging through tasks with next_cursor."""
+        url = f"/api/v1/users/{created_user}/tasks/"
+        await asyncio.gather(
+            *(client.post(url, json=sample_task_data) for _ in range(3))
+        )
+
+        first = (await client.get(url, params={"per_page": 2})).json()
+        assert first["total"] == 3
+        assert len(first["tasks"]) == 2
+        assert first["next_cursor"]
+
+        second = (await client.get(
+            url, params={"per_page": 2, "cursor": first["next_cursor"]}
+        )).json()
+        assert len(second["tasks"]) == 1
+        assert second["next_cursor"] is None
+
+        ids = [t["id"] for t in first["tasks"] + second["tasks"]]
+        assert len(set(ids)) == 3
+
+    async def test_list_user_tasks_invalid_cursor(self, client, created_user):
+        """Test a malformed cursor is rejected."""
+        response = await client.get(
+            f"/api/v1/users/{created_user}/tasks/",
+            params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_list_user_tasks_cursor_id_out_of_range(
+        self, client, created_user
+    ):
+        """Test a cursor id too large for the database is rejected."""
+        cursor = base64.urlsafe_b64encode(
+            b"2024-01-01T00:00:00|99999999999999999999999"
+        ).decode()
+        response = await client.get(
+            f"/api/v1/users/{created_user}/tasks/", params={"cursor": cursor}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "Invalid cursor"
+
+    async def test_export_user_tasks(self, client, created_user, sample_task_data):
+        """Test exporting tasks as newline-delimited JSON."""
+        await asyncio.gather(*(
+            client.post(f"/api/v1/users/{created_user}/tasks/", json=sample_task_data)
+            for _ in range(2)
+        ))
 
-    def test_update_task(self, client, created_user, sample_task_data):
+        response = await client.get(f"/api/v1/users/{created_user}/tasks/export")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        tasks = [json.loads(line) for line in response.text.splitlines()]
+        assert len(tasks) == 2
+        assert all(t["owner_id"] == created_user for t in tasks)
+        assert all(t["status"] == "pending" for t in tasks)
+
+    async def test_export_tasks_for_nonexistent_user(self, client):
+        """Test exporting tasks for non-existent user fails."""
+        response = await client.get("/api/v1/users/99999/tasks/export")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_update_task(self, client, created_user, sample_task_data):
         """Test updating a task."""
-        create_response = client.post(
+        create_response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
         task_id = create_response.json()["id"]
 
         update_data = {"title": "Updated Title", "priority": 5}
-        response = client.patch(f"/api/v1/tasks/{task_id}", json=update_data)
+        response = await client.patch(f"/api/v1/tasks/{task_id}", json=update_data)
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["title"] == "Updated Title"
         assert response.json()["priority"] == 5
 
-    def test_complete_task(self, client, created_user, sample_task_data):
+    async def test_complete_task(self, client, created_user, sample_task_data):
         """Test marking a task as completed."""
-        create_response = client.post(
+        create_response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
         task_id = create_response.json()["id"]
 
-        response = client.post(f"/api/v1/tasks/{task_id}/complete")
+        response = await client.post(f"/api/v1/tasks/{task_id}/complete")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["status"] == "completed"
 
-    def test_delete_task(self, client, created_user, sample_task_data):
+    async def test_delete_task(self, client, created_user, sample_task_data):
         """Test deleting a task."""
-        create_response = client.post(
+        create_response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
         task_id = create_response.json()["id"]
 
-        response = client.delete(f"/api/v1/tasks/{task_id}")
+        response = await client.delete(f"/api/v1/tasks/{task_id}")
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
-    def test_filter_tasks_by_status(self, client, created_user, sample_task_data):
+    async def test_filter_tasks_by_status(self, client, created_user, sample_task_data):
         """Test filtering tasks by status."""
         # Create and complete a task
-        create_response = client.post(
+        create_response = await client.post(
             f"/api/v1/users/{created_user}/tasks/",
             json=sample_task_data
         )
         task_id = create_response.json()["id"]
-        client.post(f"/api/v1/tasks/{task_id}/complete")
 
-        # Create another pending task
-        client.post(f"/api/v1/users/{created_user}/tasks/", json=sample_task_data)
+        # Complete it while creating another pending task
+        await asyncio.gather(
+            client.post(f"/api/v1/tasks/{task_id}/complete"),
+            client.post(f"/api/v1/users/{created_user}/tasks/", json=sample_task_data),
+        )
 
         # Filter by completed
-        response = client.get(
+        response = await client.get(
             f"/api/v1/users/{created_user}/tasks/",
             params={"status_filter": "completed"}
         )
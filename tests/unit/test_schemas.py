@@ -7,18 +7,84 @@ CRITICAL: These tests use Pydantic v1 features that WILL BREAK in v2:
 - @validator decorator -> becomes @field_validator
 - class Config with orm_mode -> becomes model_config with from_attributes
 """
-import pytest
+import json
 from datetime import datetime
+
+import pytest
 from pydantic import ValidationError
 
 from src.api.schemas import (
     UserCreate, UserUpdate, UserInDB, UserResponse,
     TaskCreate, TaskUpdate, TaskInDB, TaskResponse,
-    user_to_response, task_to_response
+    user_to_response, task_to_response, set_fields
 )
 from src.models.task import TaskStatus
 
 
+# Read-only objects shared by the tests in this module; building them once
+# keeps validation cost out of every test that only reads them
+
+@pytest.fixture(scope="module")
+def user_in_db():
+    """A validated UserInDB."""
+    return UserInDB(
+        id=1,
+        email="test@example.com",
+        username="testuser",
+        full_name="Test User",
+        is_active=True,
+        is_superuser=False,
+        created_at=datetime.utcnow()
+    )
+
+
+@pytest.fixture(scope="module")
+def task_in_db():
+    """A validated TaskInDB."""
+    return TaskInDB(
+        id=1,
+        title="Test Task",
+        description="Description",
+        status=TaskStatus.PENDING,
+        priority=2,
+        owner_id=1,
+        created_at=datetime.utcnow()
+    )
+
+
+@pytest.fixture(scope="module")
+def mock_user():
+    """A user-like object standing in for the ORM model."""
+    class MockUser:
+        id = 1
+        email = "orm@test.com"
+        username = "ormuser"
+        full_name = "ORM User"
+        is_active = True
+        is_superuser = False
+        created_at = datetime.utcnow()
+        updated_at = None
+
+    return MockUser()
+
+
+@pytest.fixture(scope="module")
+def mock_task():
+    """A task-like object standing in for the ORM model."""
+    class MockTask:
+        id = 1
+        title = "ORM Task"
+        description = "From ORM"
+        status = TaskStatus.IN_PROGRESS
+        priority = 4
+        owner_id = 1
+        created_at = datetime.utcnow()
+        updated_at = None
+        due_date = None
+
+    return MockTask()
+
+
 class TestUserSchemas:
     """Tests for user schemas."""
 
@@ -69,43 +135,24 @@ class TestUserSchemas:
         update_dict = update.dict(exclude_unset=True)
         assert update_dict == {"full_name": "New Name"}
 
-    def test_user_in_db_dict_conversion(self):
+    def test_user_in_db_dict_conversion(self, user_in_db):
         """Test UserInDB can convert to dict.
 
         Uses .dict() which is v1 syntax - WILL BREAK in v2
         """
-        user = UserInDB(
-            id=1,
-            email="test@example.com",
-            username="testuser",
-            full_name="Test User",
-            is_active=True,
-            is_superuser=False,
-            created_at=datetime.utcnow()
-        )
-
         # This uses v1's .dict() method - breaks in v2
-        user_dict = user.dict()
+        user_dict = user_in_db.dict()
         assert "id" in user_dict
         assert "email" in user_dict
         assert user_dict["is_active"] is True
 
-    def test_user_in_db_dict_exclude(self):
+    def test_user_in_db_dict_exclude(self, user_in_db):
         """Test dict() with exclude parameter.
 
         Uses .dict(exclude=...) which is v1 syntax
         """
-        user = UserInDB(
-            id=1,
-            email="test@example.com",
-            username="testuser",
-            is_active=True,
-            is_superuser=False,
-            created_at=datetime.utcnow()
-        )
-
         # v1 syntax for excluding fields
-        user_dict = user.dict(exclude={"is_superuser"})
+        user_dict = user_in_db.dict(exclude={"is_superuser"})
         assert "is_superuser" not in user_dict
 
 
@@ -145,81 +192,47 @@ class TestTaskSchemas:
         assert update_dict["status"] == TaskStatus.IN_PROGRESS
         assert update_dict["priority"] == 5
 
-    def test_task_in_db_dict_conversion(self):
+    def test_task_in_db_dict_conversion(self, task_in_db):
         """Test TaskInDB dict conversion.
 
         Uses .dict() which is v1 syntax - WILL BREAK in v2
         """
-        task = TaskInDB(
-            id=1,
-            title="Test Task",
-            description="Description",
-            status=TaskStatus.PENDING,
-            priority=2,
-            owner_id=1,
-            created_at=datetime.utcnow()
-        )
-
         # v1 syntax - .dict() becomes .model_dump() in v2
-        task_dict = task.dict()
+        task_dict = task_in_db.dict()
         assert task_dict["id"] == 1
         assert task_dict["status"] == "pending"  # use_enum_values=True
 
-    def test_task_in_db_json_conversion(self):
+    def test_task_in_db_json_conversion(self, task_in_db):
         """Test TaskInDB JSON conversion.
 
         Uses .json() which changes behavior in v2
         """
-        task = TaskInDB(
-            id=1,
-            title="Test Task",
-            status=TaskStatus.COMPLETED,
-            priority=1,
-            owner_id=1,
-            created_at=datetime.utcnow()
-        )
-
         # v1 syntax
-        json_str = task.json()
-        assert '"status":"completed"' in json_str or '"status": "completed"' in json_str
+        json_str = task_in_db.json()
+        assert json.loads(json_str)["status"] == "pending"
 
 
 class TestSchemaHelpers:
     """Tests for schema helper functions."""
 
-    def test_user_to_response_uses_dict(self):
+    def test_user_to_response_uses_dict(self, mock_user):
         """Test user_to_response uses Pydantic v1 methods."""
-        # Create a mock user-like object
-        class MockUser:
-            id = 1
-            email = "test@example.com"
-            username = "testuser"
-            full_name = "Test User"
-            is_active = True
-            is_superuser = False
-            created_at = datetime.utcnow()
-            updated_at = None
-
-        result = user_to_response(MockUser())
+        result = user_to_response(mock_user)
         assert isinstance(result, dict)
-        assert result["email"] == "test@example.com"
+        assert result["email"] == "orm@test.com"
 
-    def test_task_to_response_uses_dict(self):
+    def test_task_to_response_uses_dict(self, mock_task):
         """Test task_to_response uses Pydantic v1 methods."""
-        class MockTask:
-            id = 1
-            title = "Test Task"
-            description = "Test"
-            status = TaskStatus.PENDING
-            priority = 1
-            owner_id = 1
-            created_at = datetime.utcnow()
-            updated_at = None
-            due_date = None
-
-        result = task_to_response(MockTask())
+        result = task_to_response(mock_task)
         assert isinstance(result, dict)
-        assert result["title"] == "Test Task"
+        assert result["title"] == "ORM Task"
+
+    def test_set_fields_matches_exclude_unset(self):
+        """Test set_fields returns what .dict(exclude_unset=True) would."""
+        update = TaskUpdate(status=TaskStatus.COMPLETED, description=None)
+
+        assert set_fields(update) == update.dict(exclude_unset=True)
+        assert set_fields(TaskUpdate()) == {}
 
 
 class TestConfigOrmMode:
@@ -228,40 +241,19 @@ class TestConfigOrmMode:
     These will fail in Pydantic v2 where orm_mode becomes from_attributes
     """
 
-    def test_user_from_orm_creates_model(self):
+    def test_user_from_orm_creates_model(self, mock_user):
         """Test UserInDB.from_orm() works.
 
         from_orm() is v1 syntax - becomes model_validate() in v2
         """
-        class MockUser:
-            id = 1
-            email = "orm@test.com"
-            username = "ormuser"
-            full_name = "ORM User"
-            is_active = True
-            is_superuser = False
-            created_at = datetime.utcnow()
-            updated_at = None
-
         # v1 syntax - .from_orm() becomes .model_validate() in v2
-        user = UserInDB.from_orm(MockUser())
+        user = UserInDB.from_orm(mock_user)
         assert user.email == "orm@test.com"
 
-    def test_task_from_orm_creates_model(self):
+    def test_task_from_orm_creates_model(self, mock_task):
         """Test TaskInDB.from_orm() works."""
-        class MockTask:
-            id = 1
-            title = "ORM Task"
-            description = "From ORM"
-            status = TaskStatus.IN_PROGRESS
-            priority = 4
-            owner_id = 1
-            created_at = datetime.utcnow()
-            updated_at = None
-            due_date = None
-
         # v1 syntax
-        task = TaskInDB.from_orm(MockTask())
+        task = TaskInDB.from_orm(mock_task)
         assert task.title == "ORM Task"
         assert task.status == TaskStatus.IN_PROGRESS
 
@@ -3,152 +3,279 @@
 These tests exercise the Pydantic .dict() method used in services,
 which will break when upgrading from Pydantic v1 to v2.
 """
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from passlib.context import CryptContext
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from src.models.base import Base
 from src.models.user import User
 from src.models.task import Task, TaskStatus
+from src.services import user_service
 from src.services.user_service import UserService
 from src.services.task_service import TaskService
 from src.api.schemas import UserCreate, UserUpdate, TaskCreate, TaskUpdate
 
 
-# In-memory database for unit tests
-engine = create_engine("sqlite:///:memory:")
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# One shared in-memory connection for the whole module
+engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    poolclass=StaticPool,
+    connect_args={"check_same_thread": False},
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _fast_pragmas(dbapi_connection, connection_record):
+    """Drop durability the throwaway test database doesn't need."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# Validated once; tests derive their users with .copy(update=...), which
+# skips re-running the field validators
+_BASE_USER = UserCreate(
+    email="base@test.com",
+    username="baseuser",
+    password="password123"
+)
+
+TestingSessionLocal = sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+@contextmanager
+def count_queries(db):
+    """Collect the SQL statements the session executes inside the block."""
+    statements = []
+    sync_engine = db.bind.sync_engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="module")
+async def schema():
+    """Create the tables once on the shared connection."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 
 @pytest.fixture
-def db():
-    """Create fresh database for each test."""
-    Base.metadata.create_all(bind=engine)
+async def db(schema, empty_tables):
+    """Give each test a session on empty tables."""
     session = TestingSessionLocal()
     try:
         yield session
     finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
+        await session.close()
+        async with engine.begin() as conn:
+            await conn.run_sync(empty_tables)
+
+
+@pytest.fixture
+def tasks_factory():
+    """Seed tasks straight into the database, bypassing the service layer.
+
+    Returns an async ``create_tasks(db, owner_id, n, **fields)`` that adds
+    ``n`` tasks titled "Task 0".."Task n-1" in one flush and one commit.
+    """
+    async def create_tasks(db, owner_id, n, **fields):
+        tasks = [
+            Task(title=f"Task {i}", owner_id=owner_id, **fields)
+            for i in range(n)
+        ]
+        await db.run_sync(lambda session: session.bulk_save_objects(tasks))
+        await db.commit()
+
+    return create_tasks
 
 
 class TestUserService:
     """Tests for UserService."""
 
-    def test_create_user(self, db):
+    async def test_create_user(self, db):
         """Test creating a user via service."""
         service = UserService(db)
-        user_data = UserCreate(
-            email="service@test.com",
-            username="serviceuser",
-            password="password123"
-        )
+        user_data = _BASE_USER.copy(update={
+            "email": "service@test.com",
+            "username": "serviceuser",
+        })
 
-        user = service.create(user_data)
+        user = await service.create(user_data)
         assert user.id is not None
         assert user.email == "service@test.com"
         assert user.hashed_password != "password123"  # Should be hashed
 
-    def test_get_user_by_id(self, db):
+    async def test_get_user_by_id(self, db):
         """Test getting user by ID."""
         service = UserService(db)
-        user_data = UserCreate(
-            email="get@test.com",
-            username="getuser",
-            password="password123"
-        )
-        created = service.create(user_data)
+        user_data = _BASE_USER.copy(update={
+            "email": "get@test.com",
+            "username": "getuser",
+        })
+        created = await service.create(user_data)
 
-        found = service.get_by_id(created.id)
+        found = await service.get_by_id(created.id)
         assert found is not None
         assert found.email == "get@test.com"
 
-    def test_get_user_by_email(self, db):
+    async def test_get_user_by_email(self, db):
         """Test getting user by email."""
         service = UserService(db)
-        user_data = UserCreate(
-            email="email@test.com",
-            username="emailuser",
-            password="password123"
-        )
-        service.create(user_data)
+        user_data = _BASE_USER.copy(update={
+            "email": "email@test.com",
+            "username": "emailuser",
+        })
+        await service.create(user_data)
 
-        found = service.get_by_email("email@test.com")
+        found = await service.get_by_email("email@test.com")
         assert found is not None
         assert found.username == "emailuser"
 
-    def test_update_user_uses_dict(self, db):
-        """Test updating user uses Pydantic .dict().
+    async def test_find_conflict(self, db):
+        """Test detecting taken emails and usernames in one lookup."""
+        service = UserService(db)
+        await service.create(_BASE_USER.copy(update={
+            "email": "taken@test.com",
+            "username": "takenuser",
+        }))
+
+        assert await service.find_conflict("taken@test.com", "free") == "email"
+        assert await service.find_conflict("free@test.com", "takenuser") == "username"
+        assert await service.find_conflict("free@test.com", "free") is None
+
+    async def test_create_duplicate_user_raises(self, db):
+        """Test the unique constraints still guard against races."""
+        service = UserService(db)
+        user_data = _BASE_USER.copy(update={
+            "email": "race@test.com",
+            "username": "raceuser",
+        })
+        await service.create(user_data)
+
+        with pytest.raises(IntegrityError):
+            await service.create(user_data)
+
+    async def test_update_user_uses_dict(self, db):
+        """Test updating user applies only the fields that were set.
 
-        The service calls user_data.dict(exclude_unset=True)
-        which is v1 syntax and will break in v2.
+        The service reads user_data.__fields_set__, which is v1 syntax
+        (model_fields_set in v2).
         """
         service = UserService(db)
-        user_data = UserCreate(
-            email="update@test.com",
-            username="updateuser",
-            password="password123"
-        )
-        created = service.create(user_data)
+        user_data = _BASE_USER.copy(update={
+            "email": "update@test.com",
+            "username": "updateuser",
+        })
+        created = await service.create(user_data)
 
         update_data = UserUpdate(full_name="Updated Full Name")
-        updated = service.update(created.id, update_data)
+        updated = await service.update(created.id, update_data)
 
         assert updated is not None
         assert updated.full_name == "Updated Full Name"
         assert updated.email == "update@test.com"  # Unchanged
 
-    def test_authenticate_user(self, db):
+    async def test_authenticate_user(self, db, monkeypatch):
         """Test user authentication."""
-        service = UserService(db)
-        user_data = UserCreate(
-            email="auth@test.com",
-            username="authuser",
-            password="password123"
+        # Only the lookup and the accept/reject logic are under test here;
+        # hashing has its own tests, so stub it with a string compare
+        context = user_service.pwd_context
+        monkeypatch.setattr(context, "hash", lambda raw: f"stub${raw}")
+        monkeypatch.setattr(
+            context, "verify", lambda raw, hashed: hashed == f"stub${raw}"
         )
-        service.create(user_data)
+        service = UserService(db)
+        user_data = _BASE_USER.copy(update={
+            "email": "auth@test.com",
+            "username": "authuser",
+        })
+        await service.create(user_data)
 
         # Valid authentication
-        user = service.authenticate("authuser", "password123")
+        user = await service.authenticate("authuser", "password123")
         assert user is not None
         assert user.email == "auth@test.com"
 
         # Invalid password
-        user = service.authenticate("authuser", "wrongpassword")
+        user = await service.authenticate("authuser", "wrongpassword")
         assert user is None
 
-    def test_delete_user(self, db):
-        """Test deleting a user."""
+    async def test_authenticate_legacy_bcrypt_user(self, db):
+        """Test users hashed with bcrypt before the argon2 switch still log in."""
         service = UserService(db)
-        user_data = UserCreate(
-            email="delete@test.com",
-            username="deleteuser",
-            password="password123"
+        user = await service.create(_BASE_USER.copy(update={
+            "email": "legacy@test.com",
+            "username": "legacyuser",
+        }))
+        assert user.hashed_password.startswith("$argon2id$")
+
+        user.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(
+            "password123"
         )
-        created = service.create(user_data)
+        await db.commit()
+
+        assert await service.authenticate("legacyuser", "password123") is not None
 
-        result = service.delete(created.id)
+    async def test_delete_user(self, db):
+        """Test deleting a user."""
+        service = UserService(db)
+        user_data = _BASE_USER.copy(update={
+            "email": "delete@test.com",
+            "username": "deleteuser",
+        })
+        created = await service.create(user_data)
+
+        result = await service.delete(created.id)
         assert result is True
 
-        found = service.get_by_id(created.id)
+        found = await service.get_by_id(created.id)
         assert found is None
 
+    async def test_get_all_users_raises_on_lazy_load(self, db):
+        """Test list queries refuse to lazy-load relationships."""
+        service = UserService(db)
+        await service.create(_BASE_USER.copy(update={
+            "email": "list@test.com",
+            "username": "listuser",
+        }))
+        db.expunge_all()
+
+        users = await service.get_all()
+        with pytest.raises(InvalidRequestError, match="lazy=.raise."):
+            users[0].tasks
+
 
 class TestTaskService:
     """Tests for TaskService."""
 
     @pytest.fixture
-    def user(self, db):
+    async def user(self, db):
         """Create a user for task tests."""
         service = UserService(db)
-        user_data = UserCreate(
-            email="taskowner@test.com",
-            username="taskowner",
-            password="password123"
-        )
-        return service.create(user_data)
+        user_data = _BASE_USER.copy(update={
+            "email": "taskowner@test.com",
+            "username": "taskowner",
+        })
+        return await service.create(user_data)
 
-    def test_create_task_uses_dict(self, db, user):
+    async def test_create_task_uses_dict(self, db, user):
         """Test creating task uses Pydantic .dict().
 
         The service calls task_data.dict() which is v1 syntax.
@@ -160,79 +287,213 @@ class TestTaskService:
             priority=3
         )
 
-        task = service.create(task_data, owner_id=user.id)
+        task = await service.create(task_data, owner_id=user.id)
         assert task.id is not None
         assert task.title == "Test Task"
         assert task.status == TaskStatus.PENDING
 
-    def test_update_task_uses_dict(self, db, user):
-        """Test updating task uses Pydantic .dict().
+    async def test_create_task_refreshes_only_server_defaults(self, db, user):
+        """Test create reads back the timestamps without joining the owner."""
+        service = TaskService(db)
+
+        with count_queries(db) as statements:
+            task = await service.create(TaskCreate(title="Fresh"), owner_id=user.id)
+
+        assert [s.split()[0] for s in statements] == ["INSERT", "SELECT"]
+        assert "JOIN" not in statements[1]
+        assert task.created_at is not None
+        assert task.updated_at is None
+
+    async def test_bulk_create_tasks(self, db, user):
+        """Test bulk creation inserts every task in one statement."""
+        service = TaskService(db)
+        task_data = [TaskCreate(title=f"Bulk {i}", priority=2) for i in range(3)]
+
+        with count_queries(db) as statements:
+            created = await service.bulk_create(task_data, owner_id=user.id)
+
+        assert created == 3
+        assert len(statements) == 1
+        tasks, total = await service.get_by_owner(owner_id=user.id)
+        assert total == 3
+        assert all(t.status == TaskStatus.PENDING for t in tasks)
 
-        The service calls task_data.dict(exclude_unset=True)
-        which will break in Pydantic v2.
+    async def test_update_task_uses_dict(self, db, user):
+        """Test updating task applies only the fields that were set.
+
+        The service reads task_data.__fields_set__, which is v1 syntax
+        (model_fields_set in v2).
         """
         service = TaskService(db)
         task_data = TaskCreate(title="Original Title", priority=1)
-        created = service.create(task_data, owner_id=user.id)
+        created = await service.create(task_data, owner_id=user.id)
 
         update_data = TaskUpdate(title="Updated Title", priority=5)
-        updated = service.update(created.id, update_data)
+        updated = await service.update(created.id, update_data)
 
         assert updated is not None
         assert updated.title == "Updated Title"
         assert updated.priority == 5
 
-    def test_get_tasks_by_owner(self, db, user):
-        """Test getting tasks by owner."""
+    async def test_task_owner_is_eager_loaded(self, db, user):
+        """Test owner is available without a lazy load on the async session."""
+        service = TaskService(db)
+        created = await service.create(TaskCreate(title="Owned"), owner_id=user.id)
+        db.expunge_all()
+
+        task = await service.get_by_id(created.id)
+        assert task.owner.username == "taskowner"
+
+        tasks, _ = await service.get_by_owner(owner_id=user.id)
+        assert tasks[0].owner.username == "taskowner"
+
+    async def test_get_tasks_by_owner_query_count(self, db, user, tasks_factory):
+        """Test listing tasks is one query for the page plus one for owners."""
         service = TaskService(db)
+        await tasks_factory(db, user.id, 5)
+        db.expunge_all()
 
-        # Create multiple tasks
-        for i in range(5):
-            task_data = TaskCreate(title=f"Task {i}", priority=i % 5 + 1)
-            service.create(task_data, owner_id=user.id)
+        with count_queries(db) as statements:
+            tasks, _ = await service.get_by_owner(owner_id=user.id)
+            for task in tasks:
+                task.owner.username
 
-        tasks, total = service.get_by_owner(owner_id=user.id)
-        assert total == 5
-        assert len(tasks) == 5
+        assert len(statements) == 2
+        with pytest.raises(InvalidRequestError, match="lazy=.raise."):
+            tasks[0].owner.tasks
 
-    def test_get_tasks_with_status_filter(self, db, user):
-        """Test filtering tasks by status."""
+    async def test_get_tasks_by_owner_with_cursor(self, db, user):
+        """Test keyset pagination keeps the full total on every page."""
         service = TaskService(db)
 
-        # Create tasks with different statuses
-        task1 = service.create(TaskCreate(title="Task 1"), owner_id=user.id)
-        task2 = service.create(TaskCreate(title="Task 2"), owner_id=user.id)
-        service.mark_completed(task1.id)
+        for i in range(3):
+            await service.create(TaskCreate(title=f"Task {i}"), owner_id=user.id)
+
+        first, total = await service.get_by_owner(owner_id=user.id, limit=2)
+        assert total == 3
+        assert len(first) == 2
+
+        last = first[-1]
+        rest, total = await service.get_by_owner(
+            owner_id=user.id, cursor=(last.created_at, last.id), limit=2
+        )
+        assert total == 3
+        assert [t.title for t in first + rest] == ["Task 2", "Task 1", "Task 0"]
 
-        # Filter by pending
-        tasks, total = service.get_by_owner(
-            owner_id=user.id,
-            status_filter=TaskStatus.PENDING
+        last = rest[-1]
+        tasks, total = await service.get_by_owner(
+            owner_id=user.id, cursor=(last.created_at, last.id), limit=2
         )
-        assert total == 1
-        assert tasks[0].title == "Task 2"
+        assert total == 3
+        assert tasks == []
 
-    def test_mark_completed(self, db, user):
+    async def test_mark_completed(self, db, user):
         """Test marking task as completed."""
         service = TaskService(db)
         task_data = TaskCreate(title="Complete Me", priority=1)
-        created = service.create(task_data, owner_id=user.id)
+        created = await service.create(task_data, owner_id=user.id)
 
-        completed = service.mark_completed(created.id)
+        completed = await service.mark_completed(created.id)
         assert completed is not None
         assert completed.status == TaskStatus.COMPLETED
 
-    def test_get_stats(self, db, user):
-        """Test getting task statistics."""
+    async def test_mark_completed_is_update_then_select(self, db, user):
+        """Test completing a task is one UPDATE plus one SELECT."""
         service = TaskService(db)
+        created = await service.create(
+            TaskCreate(title="Complete Me"), owner_id=user.id
+        )
 
-        # Create tasks with different statuses
-        task1 = service.create(TaskCreate(title="Task 1"), owner_id=user.id)
-        task2 = service.create(TaskCreate(title="Task 2"), owner_id=user.id)
-        task3 = service.create(TaskCreate(title="Task 3"), owner_id=user.id)
-        service.mark_completed(task1.id)
-        service.mark_completed(task2.id)
+        with count_queries(db) as statements:
+            completed = await service.mark_completed(created.id)
+
+        assert [s.split()[0] for s in statements] == ["UPDATE", "SELECT"]
+        assert completed.status == TaskStatus.COMPLETED
+        assert completed.updated_at is not None
+
+    async def test_mark_completed_missing_task(self, db):
+        """Test completing a non-existent task returns None."""
+        service = TaskService(db)
+        assert await service.mark_completed(99999) is None
+
+    async def test_get_owner_id(self, db, user):
+        """Test reading a task's owner selects just that column."""
+        service = TaskService(db)
+        created = await service.create(TaskCreate(title="Owned"), owner_id=user.id)
+
+        with count_queries(db) as statements:
+            assert await service.get_owner_id(created.id) == user.id
+
+        assert len(statements) == 1
+        assert "JOIN" not in statements[0]
+        assert await service.get_owner_id(99999) is None
+
+    async def test_delete_task_is_single_statement(self, db, user):
+        """Test deleting a task is one DELETE and reports missing tasks."""
+        service = TaskService(db)
+        created = await service.create(TaskCreate(title="Delete Me"), owner_id=user.id)
+
+        with count_queries(db) as statements:
+            assert await service.delete(created.id) is True
+
+        assert [s.split()[0] for s in statements] == ["DELETE"]
+        assert await service.get_by_id(created.id) is None
+        assert await service.delete(created.id) is False
+
+
+class TestTaskQueries:
+    """Read-only task queries sharing one seeded owner and task set."""
+
+    @pytest.fixture(scope="class")
+    async def seeded(self, schema, empty_tables):
+        """One owner with two completed and three pending tasks.
+
+        Seeded once for the class in a single commit. The function-scoped
+        db fixture empties the tables after each test, so these tests use
+        their own session instead.
+        """
+        session = TestingSessionLocal()
+        owner = User(
+            email="queries@test.com",
+            username="queryowner",
+            hashed_password="not-a-real-hash",
+            tasks=[
+                Task(title=f"Task {i}", status=status)
+                for i, status in enumerate(
+                    [TaskStatus.COMPLETED] * 2 + [TaskStatus.PENDING] * 3
+                )
+            ],
+        )
+        session.add(owner)
+        await session.commit()
+        try:
+            yield TaskService(session), owner.id
+        finally:
+            await session.close()
+            async with engine.begin() as conn:
+                await conn.run_sync(empty_tables)
+
+    @pytest.mark.parametrize("status_filter, expected", [
+        (None, 5),
+        (TaskStatus.PENDING, 3),
+        (TaskStatus.COMPLETED, 2),
+    ])
+    async def test_get_tasks_by_owner(self, seeded, status_filter, expected):
+        """Test getting tasks by owner, with and without a status filter."""
+        service, owner_id = seeded
+
+        tasks, total = await service.get_by_owner(
+            owner_id=owner_id, status_filter=status_filter
+        )
+        assert total == expected
+        assert len(tasks) == expected
+        if status_filter:
+            assert all(t.status == status_filter for t in tasks)
+
+    async def test_get_stats(self, seeded):
+        """Test getting task statistics."""
+        service, owner_id = seeded
 
-        stats = service.get_stats(user.id)
+        stats = await service.get_stats(owner_id)
         assert stats["completed"] == 2
-        assert stats["pending"] == 1
+        assert stats["pending"] == 3